@@ -0,0 +1,62 @@
+# app/db/cache.py
+import os
+import orjson
+from dotenv import load_dotenv
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CATALOG_CACHE_PREFIX = "catalog:"
+
+# Caching is skipped entirely when no Redis is configured. Redis errors fail
+# open: reads count as a miss and failed writes/deletes are ignored, so an
+# outage only costs the cache, not the request.
+redis_client = (
+    aioredis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    if REDIS_URL
+    else None
+)
+
+def user_cache_key(user_id) -> str:
+    return f"user:{user_id}"
+
+def catalog_cache_key(category, difficulty, search) -> str:
+    return CATALOG_CACHE_PREFIX + orjson.dumps([category, difficulty, search]).decode()
+
+async def cache_get(key: str):
+    if redis_client is None:
+        return None
+    try:
+        value = await redis_client.get(key)
+    except RedisError:
+        return None
+    return orjson.loads(value) if value is not None else None
+
+async def cache_set(key: str, value, ttl: int = CACHE_TTL):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(value, default=str))
+    except RedisError:
+        pass
+
+async def cache_delete(*keys: str):
+    if redis_client is None or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+async def cache_delete_prefix(prefix: str):
+    if redis_client is None:
+        return
+    try:
+        keys = [key async for key in redis_client.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await redis_client.delete(*keys)
+    except RedisError:
+        pass
\ No newline at end of file
@@ -7,8 +7,23 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
+# Name of an Atlas Search index on course_catalog; falls back to $text when unset
+ATLAS_SEARCH_INDEX = os.getenv("ATLAS_SEARCH_INDEX")
+# Case-insensitive comparison for the catalog title/tags prefix indexes
+CATALOG_COLLATION = {"locale": "en", "strength": 2}
 
-client = AsyncIOMotorClient(MONGO_URI)
+MONGO_POOL = int(os.getenv("MONGO_POOL", "50"))
+
+# One client per process, created at import. Motor is asyncio-native, so
+# queries never block the event loop the way sync PyMongo calls would.
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_POOL,
+    minPoolSize=min(5, MONGO_POOL),
+    serverSelectionTimeoutMS=2000,
+    uuidRepresentation="standard",
+    tz_aware=True,
+)
 if DB_NAME:
     db = client[DB_NAME]
 
@@ -19,4 +34,26 @@ user_courses_collection = db.user_courses
 quiz_progress_collection = db.quiz_progress
 quiz_questions_collection = db.quiz_questions
 game_progress_collection = db.game_progress
-course_catalog_collection = db.course_catalog
\ No newline at end of file
+course_catalog_collection = db.course_catalog
+
+async def ensure_indexes():
+    await users_collection.create_index("email", unique=True)
+    await user_profiles_collection.create_index("user_id", unique=True)
+    await user_courses_collection.create_index(
+        [("user_id", 1), ("course_slug", 1)], unique=True
+    )
+    # backs the get_course_enrollments $match + $sort
+    await user_courses_collection.create_index([("course_slug", 1), ("enrolled_at", -1)])
+    await game_progress_collection.create_index(
+        [("user_id", 1), ("game_id", 1)], unique=True
+    )
+    await quiz_progress_collection.create_index([("user_id", 1), ("quiz_id", 1)])
+    await quiz_questions_collection.create_index("quiz_id")
+    await course_catalog_collection.create_index("slug", unique=True)
+    await course_catalog_collection.create_index([("category", 1), ("difficulty", 1)])
+    await course_catalog_collection.create_index(
+        [("title", "text"), ("description", "text"), ("tags", "text")]
+    )
+    # type-ahead prefix search on short queries
+    await course_catalog_collection.create_index("title", collation=CATALOG_COLLATION)
+    await course_catalog_collection.create_index("tags", collation=CATALOG_COLLATION)
\ No newline at end of file
@@ -1,6 +1,9 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from database.database import ensure_indexes
 from services import auth_services, course_services, quiz_services, game_services
 from schemas.schemas import (
     UserCreate, UserLogin, UserUpdate, UserPatch,
@@ -8,7 +11,7 @@ from schemas.schemas import (
     QuizAttemptCreate, QuestionCreate
 )
 
-app = FastAPI(title="Learning Platform API")
+app = FastAPI(title="Learning Platform API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,14 +21,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    # Keep the middleware stack pure ASGI: BaseHTTPMiddleware wraps every
+    # request/response in extra objects and tasks on the hot path.
+    for middleware in app.user_middleware:
+        if isinstance(middleware.cls, type) and issubclass(middleware.cls, BaseHTTPMiddleware):
+            raise RuntimeError(
+                f"{middleware.cls.__name__} subclasses BaseHTTPMiddleware; "
+                "write it as a pure ASGI middleware instead"
+            )
+
+    await ensure_indexes()
+
 @app.get("/")
 def root():
     return {"message": "Learning Platform API up and running"}
 
 # Auth Routes
 @app.post("/register", status_code=201)
-async def register_user(payload: UserCreate):
-    return await auth_services.AuthService.register_user(payload)
+async def register_user(payload: UserCreate, background_tasks: BackgroundTasks):
+    return await auth_services.AuthService.register_user(payload, background_tasks)
 
 @app.post("/login")
 async def login_user(payload: UserLogin):
@@ -33,8 +49,10 @@ async def login_user(payload: UserLogin):
 
 # User Routes
 @app.get("/users")
-async def get_all_users():
-    return await auth_services.UserService.get_all_users()
+async def get_all_users(skip: int = Query(0, ge=0), limit: int = Query(0, ge=0)):
+    # already plain str/bool data: hand it straight to orjson and skip
+    # FastAPI's per-field jsonable_encoder pass over the whole list
+    return ORJSONResponse(await auth_services.UserService.get_all_users(skip, limit))
 
 @app.get("/users/{user_id}")
 async def get_user(user_id: str):
@@ -59,7 +77,7 @@ async def enroll_course(user_id: str, payload: CourseEnroll):
 
 @app.get("/users/{user_id}/courses")
 async def get_user_courses(user_id: str):
-    return await course_services.CourseService.get_user_courses(user_id)
+    return ORJSONResponse(await course_services.CourseService.get_user_courses(user_id))
 
 @app.get("/users/{user_id}/courses/{course_slug}")
 async def get_user_course_progress(user_id: str, course_slug: str):
@@ -80,11 +98,11 @@ async def get_course_catalog(
     difficulty: str = None,
     search: str = None
 ):
-    return await course_services.CourseCatalogService.get_course_catalog(
+    return ORJSONResponse(await course_services.CourseCatalogService.get_course_catalog(
         category=category,
         difficulty=difficulty,
         search=search
-    )
+    ))
 
 @app.get("/courses/catalog/{slug}")
 async def get_course_by_slug(slug: str):
@@ -113,11 +131,14 @@ async def create_question(quiz_id: str, payload: QuestionCreate):
 
 @app.get("/quizzes/{quiz_id}/questions")
 async def get_quiz_questions(quiz_id: str):
-    return await quiz_services.QuizService.get_quiz_questions(quiz_id)
+    return ORJSONResponse(await quiz_services.QuizService.get_quiz_questions(quiz_id))
 
 @app.get("/quizzes/questions/all")
 async def get_all_quiz_questions():
-    return await quiz_services.QuizService.get_all_quiz_questions()
+    return StreamingResponse(
+        quiz_services.QuizService.get_all_quiz_questions(),
+        media_type="application/x-ndjson",
+    )
 
 @app.post("/users/{user_id}/quizzes/attempt", status_code=201)
 async def submit_quiz_attempt(user_id: str, payload: QuizAttemptCreate):
@@ -125,13 +146,13 @@ async def submit_quiz_attempt(user_id: str, payload: QuizAttemptCreate):
 
 @app.get("/users/{user_id}/quizzes")
 async def get_user_quiz_attempts(user_id: str):
-    return await quiz_services.QuizService.get_user_quiz_attempts(user_id)
+    return ORJSONResponse(await quiz_services.QuizService.get_user_quiz_attempts(user_id))
 
 
 
 @app.get("/users/{user_id}/games")
 async def get_game_progress(user_id: str):
-    return await game_services.GameService.get_game_progress(user_id)
+    return ORJSONResponse(await game_services.GameService.get_game_progress(user_id))
 
 @app.post("/users/{user_id}/games/{game_id}/progress")
 async def update_game_progress(
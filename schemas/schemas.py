@@ -1,5 +1,5 @@
 # app/schemas/schemas.py
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, ValidationInfo, field_validator
 from typing import Optional, List
 
 class UserCreate(BaseModel):
@@ -9,6 +9,15 @@ class UserCreate(BaseModel):
     lastName: str
     role: str = Field(default="User")
 
+    def to_mongo(self, hashed_password: str) -> dict:
+        return {
+            "email": self.email,
+            "password": hashed_password,
+            "first_name": self.firstName,
+            "last_name": self.lastName,
+            "role": self.role,
+        }
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -46,15 +55,17 @@ class QuestionCreate(BaseModel):
     points: int = Field(default=1, ge=1)
     questionType: str = Field(default="multiple_choice")
 
-    @validator('options')
+    @field_validator('options')
+    @classmethod
     def validate_options(cls, v):
         if len(v) < 2:
             raise ValueError('At least 2 options are required')
         return v
     
-    @validator('correctAnswer')
-    def validate_correct_answer(cls, v, values):
-        if 'options' in values and v not in values['options']:
+    @field_validator('correctAnswer')
+    @classmethod
+    def validate_correct_answer(cls, v, info: ValidationInfo):
+        if 'options' in info.data and v not in info.data['options']:
             raise ValueError('Correct answer must be one of the options')
         return v
 
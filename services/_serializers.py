@@ -0,0 +1,67 @@
+# app/services/_serializers.py
+
+def serialize_course(course: dict) -> dict:
+    return {
+        "id": str(course["_id"]),
+        "userId": str(course["user_id"]),
+        "courseSlug": course["course_slug"],
+        "category": course.get("category", "General"),
+        "difficulty": course.get("difficulty", "Beginner"),
+        "progress": course["progress"],
+        "completed": course["completed"],
+        "lastAccessed": course["last_accessed"],
+        "enrolledAt": course.get("enrolled_at"),
+    }
+
+def serialize_course_catalog(course: dict) -> dict:
+    return {
+        "id": str(course["_id"]),
+        "slug": course["slug"],
+        "title": course["title"],
+        "description": course["description"],
+        "category": course["category"],
+        "difficulty": course["difficulty"],
+        "duration": course.get("duration", 0),
+        "totalQuizzes": course.get("total_quizzes", 0),
+        "totalLessons": course.get("total_lessons", 0),
+        "instructor": course.get("instructor", ""),
+        "prerequisites": course.get("prerequisites", []),
+        "tags": course.get("tags", []),
+        "thumbnail": course.get("thumbnail", ""),
+        "createdAt": course.get("created_at"),
+    }
+
+def serialize_question(question: dict) -> dict:
+    data = {
+        "id": str(question["_id"]),
+        "quizId": question["quiz_id"],
+        "question": question["question"],
+        "options": question["options"],
+        "explanation": question.get("explanation", ""),
+        "points": question.get("points", 1),
+        "questionType": question.get("question_type", "multiple_choice"),
+    }
+    if "correct_answer" in question:
+        data["correctAnswer"] = question["correct_answer"]
+    return data
+
+def serialize_quiz_attempt(attempt: dict) -> dict:
+    return {
+        "id": str(attempt["_id"]),
+        "userId": str(attempt["user_id"]),
+        "quizId": attempt["quiz_id"],
+        "courseSlug": attempt.get("course_slug"),
+        "score": attempt["score"],
+        "passed": attempt["passed"],
+        "attemptedAt": attempt["attempted_at"],
+    }
+
+def serialize_game(game: dict) -> dict:
+    return {
+        "id": str(game["_id"]),
+        "userId": str(game["user_id"]),
+        "gameId": game["game_id"],
+        "level": game["level"],
+        "xp": game["xp"],
+        "lastPlayed": game["last_played"],
+    }
\ No newline at end of file
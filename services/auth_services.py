@@ -1,70 +1,72 @@
 # app/services/auth_services.py
-from fastapi import HTTPException, status
-from datetime import datetime
+from fastapi import HTTPException, BackgroundTasks
+import asyncio
+from datetime import datetime, timezone
 from typing import Optional
-from bson import ObjectId
-import hashlib
-from database.database import users_collection, user_profiles_collection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database.database import (
+    users_collection,
+    user_profiles_collection,
+    user_courses_collection,
+    quiz_progress_collection,
+    game_progress_collection,
+)
+from database.cache import cache_get, cache_set, cache_delete, user_cache_key
 from services.seed_services import seed_user_data
 from schemas.schemas import UserCreate, UserLogin, UserUpdate, UserPatch
-
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return hash_password(plain) == hashed
-
-def validate_object_id(user_id: str) -> ObjectId:
-    if not ObjectId.is_valid(user_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"message": "Invalid user ID"},
-        )
-    return ObjectId(user_id)
-
-def serialize_user(user: dict) -> dict:
-    return {
-        "id": str(user["_id"]),
-        "email": user["email"],
-        "firstName": user.get("first_name"),
-        "lastName": user.get("last_name"),
-        "role": user.get("role", "User"),
-        "isActive": user.get("is_active", True),
-    }
+from utils.auth_utils import (
+    hash_password,
+    verify_password,
+    validate_object_id,
+    serialize_user,
+    USER_PROJECTION,
+)
+
+# login additionally needs the hash
+LOGIN_PROJECTION = {**USER_PROJECTION, "password": 1}
+
+# UserPatch field name -> users document field name
+_PATCH_FIELD_MAP = {
+    "email": "email",
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "role": "role",
+    "isActive": "is_active",
+}
 
 def serialize_profile(profile: dict) -> dict:
     return {
         "id": str(profile["_id"]),
         "userId": str(profile["user_id"]),
-        "role": profile["role"],
+        "role": profile.get("role"),
         "registeredCourses": profile["registered_courses"],
         "createdAt": profile["created_at"],
     }
 
+_INVALID_CREDENTIALS = {"message": "Invalid email or password"}
+_USER_NOT_FOUND = {"message": "User not found"}
+_NO_UPDATE_FIELDS = {"message": "No fields provided for update"}
+
 class AuthService:
     
     @staticmethod
-    async def register_user(payload: UserCreate):
-        if await users_collection.find_one({"email": payload.email}):
+    async def register_user(payload: UserCreate, background_tasks: BackgroundTasks):
+        user = payload.to_mongo(hash_password(payload.password))
+        user["is_active"] = True
+        user["created_at"] = datetime.now(timezone.utc)
+
+        try:
+            result = await users_collection.insert_one(user)
+        except DuplicateKeyError:
             raise HTTPException(
                 status_code=400,
                 detail={"message": "Email already registered"},
             )
-
-        user = {
-            "email": payload.email,
-            "password": hash_password(payload.password),
-            "first_name": payload.firstName,
-            "last_name": payload.lastName,
-            "role": payload.role,
-            "is_active": True,
-            "created_at": datetime.utcnow(),
-        }
-
-        result = await users_collection.insert_one(user)
         user["_id"] = result.inserted_id
 
-        await seed_user_data(user["_id"], payload.role)
+        # Seed profile/courses/games after the response has been sent
+        background_tasks.add_task(seed_user_data, user["_id"], payload.role)
 
         return {
             "message": "User registered successfully",
@@ -73,13 +75,12 @@ class AuthService:
     
     @staticmethod
     async def login_user(payload: UserLogin):
-        user = await users_collection.find_one({"email": payload.email})
+        user = await users_collection.find_one(
+            {"email": payload.email}, LOGIN_PROJECTION
+        )
 
         if not user or not verify_password(payload.password, user["password"]):
-            raise HTTPException(
-                status_code=401,
-                detail={"message": "Invalid email or password"},
-            )
+            raise HTTPException(status_code=401, detail=_INVALID_CREDENTIALS)
 
         return {
             "message": "Login successful",
@@ -89,61 +90,88 @@ class AuthService:
 class UserService:
     
     @staticmethod
-    async def get_all_users():
-        users = []
-        async for user in users_collection.find():
-            users.append(serialize_user(user))
+    async def get_all_users(skip: int = 0, limit: int = 0):
+        # limit=0 means no limit, matching pymongo's cursor semantics
+        users = await users_collection.find(
+            {}, USER_PROJECTION, skip=skip, limit=limit
+        ).to_list(length=None)
 
         return {
             "message": "Users fetched successfully",
-            "data": users,
+            "data": [serialize_user(user) for user in users],
         }
     
     @staticmethod
     async def get_user(user_id: str):
         oid = validate_object_id(user_id)
 
-        user = await users_collection.find_one({"_id": oid})
-        if not user:
-            raise HTTPException(
-                status_code=404,
-                detail={"message": "User not found"},
-            )
+        cached = await cache_get(user_cache_key(oid))
+        if cached is not None:
+            return cached
+
+        # fetch the user and join its profile server-side in one round trip
+        users = await users_collection.aggregate([
+            {"$match": {"_id": oid}},
+            {"$limit": 1},
+            {"$project": USER_PROJECTION},
+            {
+                "$lookup": {
+                    "from": "user_profiles",
+                    "localField": "_id",
+                    "foreignField": "user_id",
+                    "as": "profile",
+                }
+            },
+        ]).to_list(1)
+        if not users:
+            raise HTTPException(status_code=404, detail=_USER_NOT_FOUND)
 
-        profile = await user_profiles_collection.find_one({"user_id": oid})
+        user = users[0]
         # Note: courses and games would need their respective collections
         # We'll handle those in course_services
 
-        return {
+        result = {
             "message": "User fetched successfully",
             "data": {
                 "user": serialize_user(user),
-                "profile": serialize_profile(profile) if profile else None,
+                "profile": serialize_profile(user["profile"][0]) if user["profile"] else None,
             },
         }
+        # The profile is seeded in the background after registration, and an
+        # early enrollment can create it without a role first; don't cache a
+        # read that raced ahead of the seed
+        if user["profile"] and "role" in user["profile"][0]:
+            await cache_set(user_cache_key(oid), result)
+
+        return result
     
     @staticmethod
     async def update_user(user_id: str, payload: UserUpdate):
         oid = validate_object_id(user_id)
 
-        result = await users_collection.update_one(
-            {"_id": oid},
-            {"$set": {
-                "email": payload.email,
-                "first_name": payload.firstName,
-                "last_name": payload.lastName,
-                "role": payload.role,
-                "is_active": payload.isActive,
-            }},
-        )
-
-        if result.matched_count == 0:
+        try:
+            user = await users_collection.find_one_and_update(
+                {"_id": oid},
+                {"$set": {
+                    "email": payload.email,
+                    "first_name": payload.firstName,
+                    "last_name": payload.lastName,
+                    "role": payload.role,
+                    "is_active": payload.isActive,
+                }},
+                projection=USER_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
             raise HTTPException(
-                status_code=404,
-                detail={"message": "User not found"},
+                status_code=400,
+                detail={"message": "Email already registered"},
             )
 
-        user = await users_collection.find_one({"_id": oid})
+        if user is None:
+            raise HTTPException(status_code=404, detail=_USER_NOT_FOUND)
+
+        await cache_delete(user_cache_key(oid))
 
         return {
             "message": "User updated successfully",
@@ -154,37 +182,33 @@ class UserService:
     async def patch_user(user_id: str, payload: UserPatch):
         oid = validate_object_id(user_id)
 
-        update_data = {}
-
-        if payload.email is not None:
-            update_data["email"] = payload.email
-        if payload.firstName is not None:
-            update_data["first_name"] = payload.firstName
-        if payload.lastName is not None:
-            update_data["last_name"] = payload.lastName
-        if payload.role is not None:
-            update_data["role"] = payload.role
-        if payload.isActive is not None:
-            update_data["is_active"] = payload.isActive
+        update_data = {
+            _PATCH_FIELD_MAP[field]: value
+            for field, value in payload.model_dump(
+                exclude_unset=True, exclude_none=True
+            ).items()
+        }
 
         if not update_data:
+            raise HTTPException(status_code=400, detail=_NO_UPDATE_FIELDS)
+
+        try:
+            user = await users_collection.find_one_and_update(
+                {"_id": oid},
+                {"$set": update_data},
+                projection=USER_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
             raise HTTPException(
                 status_code=400,
-                detail={"message": "No fields provided for update"},
+                detail={"message": "Email already registered"},
             )
 
-        result = await users_collection.update_one(
-            {"_id": oid},
-            {"$set": update_data},
-        )
+        if user is None:
+            raise HTTPException(status_code=404, detail=_USER_NOT_FOUND)
 
-        if result.matched_count == 0:
-            raise HTTPException(
-                status_code=404,
-                detail={"message": "User not found"},
-            )
-
-        user = await users_collection.find_one({"_id": oid})
+        await cache_delete(user_cache_key(oid))
 
         return {
             "message": "User updated successfully",
@@ -195,15 +219,18 @@ class UserService:
     async def delete_user(user_id: str):
         oid = validate_object_id(user_id)
 
-        result = await users_collection.delete_one({"_id": oid})
+        # delete the user and its related data concurrently; the dependent
+        # deletes are no-ops when the user doesn't exist
+        result, *_ = await asyncio.gather(
+            users_collection.delete_one({"_id": oid}),
+            user_profiles_collection.delete_many({"user_id": oid}),
+            user_courses_collection.delete_many({"user_id": oid}),
+            quiz_progress_collection.delete_many({"user_id": oid}),
+            game_progress_collection.delete_many({"user_id": oid}),
+        )
         if result.deleted_count == 0:
-            raise HTTPException(
-                status_code=404,
-                detail={"message": "User not found"},
-            )
+            raise HTTPException(status_code=404, detail=_USER_NOT_FOUND)
 
-        # clean up related data
-        await user_profiles_collection.delete_many({"user_id": oid})
-        # Note: We'll delete courses and quizzes in their respective services
+        await cache_delete(user_cache_key(oid))
 
         return None  # 204 No Content
\ No newline at end of file
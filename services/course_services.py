@@ -1,47 +1,99 @@
 # app/services/course_services.py
 from fastapi import HTTPException, Query
-from datetime import datetime
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Optional, List
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from database.database import (
     course_catalog_collection, 
     user_courses_collection,
     user_profiles_collection,
-    users_collection
+    users_collection,
+    ATLAS_SEARCH_INDEX,
+    CATALOG_COLLATION,
+)
+from database.cache import (
+    cache_get,
+    cache_set,
+    cache_delete,
+    cache_delete_prefix,
+    user_cache_key,
+    catalog_cache_key,
+    CATALOG_CACHE_PREFIX,
 )
 from schemas.schemas import CourseEnroll, CourseCatalogCreate, CourseProgressUpdate
-from services.auth_services import validate_object_id, serialize_user
+from utils.auth_utils import validate_object_id, serialize_user, USER_PROJECTION
+from services._serializers import serialize_course, serialize_course_catalog
+
+# Fields the serializers read; _id is always returned.
+COURSE_PROJECTION = {
+    "user_id": 1,
+    "course_slug": 1,
+    "category": 1,
+    "difficulty": 1,
+    "progress": 1,
+    "completed": 1,
+    "last_accessed": 1,
+    "enrolled_at": 1,
+}
+CATALOG_PROJECTION = {
+    "slug": 1,
+    "title": 1,
+    "description": 1,
+    "category": 1,
+    "difficulty": 1,
+    "duration": 1,
+    "total_quizzes": 1,
+    "total_lessons": 1,
+    "instructor": 1,
+    "prerequisites": 1,
+    "tags": 1,
+    "thumbnail": 1,
+    "created_at": 1,
+}
+
+_CATALOG_COURSE_NOT_FOUND = {"message": "Course not found in catalog"}
+_ENROLLMENT_NOT_FOUND = {"message": "Course enrollment not found"}
+_COURSE_NOT_FOUND = {"message": "Course not found"}
+_SLUG_CHANGE_NOT_ALLOWED = {"message": "Cannot change course slug"}
+
+# Per-process slug -> (expires_at, catalog doc). The catalog changes rarely,
+# so a short TTL bounds staleness across workers; local writes invalidate
+# immediately. Misses aren't cached, so a course created on another worker
+# shows up on the next lookup.
+CATALOG_LOOKUP_TTL = 60
+CATALOG_LOOKUP_MAXSIZE = 1024
+_catalog_lookup_cache = OrderedDict()
+# Bumped by every local write to a slug; a fetch that was in flight across
+# a write would otherwise store the pre-write document again.
+_catalog_generation = {}
+
+async def get_catalog_course(slug: str) -> Optional[dict]:
+    """Fetch a catalog course by slug through the in-process TTL cache."""
+    now = time.monotonic()
+    entry = _catalog_lookup_cache.get(slug)
+    if entry is not None and entry[0] > now:
+        _catalog_lookup_cache.move_to_end(slug)
+        return entry[1]
+
+    generation = _catalog_generation.get(slug, 0)
+    course = await course_catalog_collection.find_one({"slug": slug}, CATALOG_PROJECTION)
+    if course is None or _catalog_generation.get(slug, 0) != generation:
+        return course
 
-def serialize_course(course: dict) -> dict:
-    return {
-        "id": str(course["_id"]),
-        "userId": str(course["user_id"]),
-        "courseSlug": course["course_slug"],
-        "category": course.get("category", "General"),
-        "difficulty": course.get("difficulty", "Beginner"),
-        "progress": course["progress"],
-        "completed": course["completed"],
-        "lastAccessed": course["last_accessed"],
-        "enrolledAt": course.get("enrolled_at"),
-    }
+    _catalog_lookup_cache[slug] = (now + CATALOG_LOOKUP_TTL, course)
+    _catalog_lookup_cache.move_to_end(slug)
+    if len(_catalog_lookup_cache) > CATALOG_LOOKUP_MAXSIZE:
+        _catalog_lookup_cache.popitem(last=False)
+    return course
 
-def serialize_course_catalog(course: dict) -> dict:
-    return {
-        "id": str(course["_id"]),
-        "slug": course["slug"],
-        "title": course["title"],
-        "description": course["description"],
-        "category": course["category"],
-        "difficulty": course["difficulty"],
-        "duration": course.get("duration", 0),
-        "totalQuizzes": course.get("total_quizzes", 0),
-        "totalLessons": course.get("total_lessons", 0),
-        "instructor": course.get("instructor", ""),
-        "prerequisites": course.get("prerequisites", []),
-        "tags": course.get("tags", []),
-        "thumbnail": course.get("thumbnail", ""),
-        "createdAt": course.get("created_at"),
-    }
+def invalidate_catalog_course(slug: str):
+    _catalog_generation[slug] = _catalog_generation.get(slug, 0) + 1
+    _catalog_lookup_cache.pop(slug, None)
 
 class CourseService:
     
@@ -50,18 +102,11 @@ class CourseService:
         oid = validate_object_id(user_id)
 
         # Check if course exists in catalog
-        catalog_course = await course_catalog_collection.find_one({"slug": payload.courseSlug})
+        catalog_course = await get_catalog_course(payload.courseSlug)
         if not catalog_course:
-            raise HTTPException(404, {"message": "Course not found in catalog"})
-
-        existing = await user_courses_collection.find_one({
-            "user_id": oid,
-            "course_slug": payload.courseSlug,
-        })
-
-        if existing:
-            raise HTTPException(400, {"message": "Already enrolled in this course"})
+            raise HTTPException(status_code=404, detail=_CATALOG_COURSE_NOT_FOUND)
 
+        now = datetime.now(timezone.utc)
         course = {
             "user_id": oid,
             "course_slug": payload.courseSlug,
@@ -69,17 +114,30 @@ class CourseService:
             "difficulty": catalog_course.get("difficulty", payload.difficulty),
             "progress": 0,
             "completed": False,
-            "last_accessed": datetime.utcnow(),
-            "enrolled_at": datetime.utcnow(),
+            "last_accessed": now,
+            "enrolled_at": now,
         }
 
-        result = await user_courses_collection.insert_one(course)
+        # The unique (user_id, course_slug) index rejects duplicate
+        # enrollments; $addToSet is idempotent, so it can run alongside.
+        # Upsert: the profile may not be seeded yet right after registration.
+        try:
+            result, _ = await asyncio.gather(
+                user_courses_collection.insert_one(course),
+                user_profiles_collection.update_one(
+                    {"user_id": oid},
+                    {
+                        "$setOnInsert": {"created_at": now},
+                        "$addToSet": {"registered_courses": payload.courseSlug},
+                    },
+                    upsert=True,
+                ),
+            )
+        except DuplicateKeyError:
+            raise HTTPException(400, {"message": "Already enrolled in this course"})
         course["_id"] = result.inserted_id
 
-        await user_profiles_collection.update_one(
-            {"user_id": oid},
-            {"$addToSet": {"registered_courses": payload.courseSlug}},
-        )
+        await cache_delete(user_cache_key(oid))
 
         return {
             "message": "Course enrolled successfully",
@@ -90,13 +148,13 @@ class CourseService:
     async def get_user_courses(user_id: str):
         oid = validate_object_id(user_id)
 
-        courses = []
-        async for c in user_courses_collection.find({"user_id": oid}):
-            courses.append(serialize_course(c))
+        courses = await user_courses_collection.find(
+            {"user_id": oid}, COURSE_PROJECTION
+        ).batch_size(200).to_list(length=None)
 
         return {
             "message": "User courses fetched",
-            "data": courses,
+            "data": [serialize_course(c) for c in courses],
         }
     
     @staticmethod
@@ -104,16 +162,18 @@ class CourseService:
         """Get a user's progress for a specific course"""
         oid = validate_object_id(user_id)
         
-        course = await user_courses_collection.find_one({
-            "user_id": oid,
-            "course_slug": course_slug,
-        })
+        # The catalog lookup only depends on the slug, so run it alongside
+        # the enrollment lookup
+        course, catalog_course = await asyncio.gather(
+            user_courses_collection.find_one(
+                {"user_id": oid, "course_slug": course_slug},
+                COURSE_PROJECTION,
+            ),
+            get_catalog_course(course_slug),
+        )
         
         if not course:
-            raise HTTPException(404, {"message": "Course enrollment not found"})
-        
-        # Get course details from catalog
-        catalog_course = await course_catalog_collection.find_one({"slug": course_slug})
+            raise HTTPException(status_code=404, detail=_ENROLLMENT_NOT_FOUND)
         
         return {
             "message": "User course progress fetched",
@@ -127,28 +187,22 @@ class CourseService:
     async def update_course_progress(user_id: str, course_slug: str, payload: CourseProgressUpdate):
         oid = validate_object_id(user_id)
 
-        course = await user_courses_collection.find_one({
-            "user_id": oid,
-            "course_slug": course_slug
-        })
-
-        if not course:
-            raise HTTPException(404, {"message": "Course enrollment not found"})
-
         update_data = {
             "progress": payload.progress,
-            "last_accessed": datetime.utcnow(),
+            "last_accessed": datetime.now(timezone.utc),
         }
         
         if payload.completed is not None:
             update_data["completed"] = payload.completed
 
-        await user_courses_collection.update_one(
-            {"_id": course["_id"]},
-            {"$set": update_data}
+        updated_course = await user_courses_collection.find_one_and_update(
+            {"user_id": oid, "course_slug": course_slug},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
         )
 
-        updated_course = await user_courses_collection.find_one({"_id": course["_id"]})
+        if not updated_course:
+            raise HTTPException(status_code=404, detail=_ENROLLMENT_NOT_FOUND)
 
         return {
             "message": "Course progress updated",
@@ -159,10 +213,6 @@ class CourseCatalogService:
     
     @staticmethod
     async def create_course_catalog(payload: CourseCatalogCreate):
-        existing = await course_catalog_collection.find_one({"slug": payload.slug})
-        if existing:
-            raise HTTPException(400, {"message": "Course with this slug already exists"})
-
         course = {
             "slug": payload.slug,
             "title": payload.title,
@@ -176,11 +226,17 @@ class CourseCatalogService:
             "prerequisites": payload.prerequisites,
             "tags": payload.tags,
             "thumbnail": payload.thumbnail,
-            "created_at": datetime.utcnow(),
+            "created_at": datetime.now(timezone.utc),
         }
 
-        result = await course_catalog_collection.insert_one(course)
+        # the unique slug index rejects duplicates
+        try:
+            result = await course_catalog_collection.insert_one(course)
+        except DuplicateKeyError:
+            raise HTTPException(400, {"message": "Course with this slug already exists"})
         course["_id"] = result.inserted_id
+        invalidate_catalog_course(payload.slug)
+        await cache_delete_prefix(CATALOG_CACHE_PREFIX)
 
         return {
             "message": "Course added to catalog successfully",
@@ -193,34 +249,65 @@ class CourseCatalogService:
         difficulty: Optional[str] = None,
         search: Optional[str] = None
     ):
+        cache_key = catalog_cache_key(category, difficulty, search)
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         query = {}
         
         if category:
             query["category"] = category
         if difficulty:
             query["difficulty"] = difficulty
-        if search:
-            query["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-                {"tags": {"$regex": search, "$options": "i"}},
-            ]
+        terms = search.split() if search else []
+        if len(terms) == 1:
+            # A single token is type-ahead input: $text only matches whole
+            # words, so results would flicker while the word is being typed.
+            # Range scan on the case-insensitive title/tags indexes instead;
+            # under the collation "\uffff" sorts after every character, closing
+            # the prefix. $elemMatch keeps both bounds on the same tag. Only
+            # title/tag prefixes match, description is not searched.
+            prefix = {"$gte": terms[0], "$lt": terms[0] + "\uffff"}
+            query["$or"] = [{"title": prefix}, {"tags": {"$elemMatch": prefix}}]
+            cursor = course_catalog_collection.find(
+                query, CATALOG_PROJECTION, collation=CATALOG_COLLATION
+            )
+        elif terms and ATLAS_SEARCH_INDEX:
+            # $search must be the first stage; filters follow as a $match
+            cursor = course_catalog_collection.aggregate([
+                {"$search": {
+                    "index": ATLAS_SEARCH_INDEX,
+                    "text": {
+                        "query": search,
+                        "path": ["title", "description", "tags"],
+                    },
+                }},
+                {"$match": query},
+                {"$project": CATALOG_PROJECTION},
+            ])
+        else:
+            if terms:
+                # multi-word input, served by the title/description/tags text index
+                query["$text"] = {"$search": search}
+            cursor = course_catalog_collection.find(query, CATALOG_PROJECTION)
 
-        courses = []
-        async for c in course_catalog_collection.find(query):
-            courses.append(serialize_course_catalog(c))
+        courses = await cursor.batch_size(200).to_list(length=None)
 
-        return {
+        result = {
             "message": "Course catalog fetched",
-            "data": courses,
+            "data": [serialize_course_catalog(c) for c in courses],
         }
+        await cache_set(cache_key, result)
+
+        return result
     
     @staticmethod
     async def get_course_by_slug(slug: str):
         """Get a single course by its slug"""
-        course = await course_catalog_collection.find_one({"slug": slug})
+        course = await get_catalog_course(slug)
         if not course:
-            raise HTTPException(404, {"message": "Course not found"})
+            raise HTTPException(status_code=404, detail=_COURSE_NOT_FOUND)
         
         return {
             "message": "Course fetched successfully",
@@ -230,13 +317,9 @@ class CourseCatalogService:
     @staticmethod
     async def update_course_catalog(slug: str, payload: CourseCatalogCreate):
         """Update a course in the catalog"""
-        existing_course = await course_catalog_collection.find_one({"slug": slug})
-        if not existing_course:
-            raise HTTPException(404, {"message": "Course not found"})
-        
         # Don't allow changing the slug
         if payload.slug != slug:
-            raise HTTPException(400, {"message": "Cannot change course slug"})
+            raise HTTPException(status_code=400, detail=_SLUG_CHANGE_NOT_ALLOWED)
         
         update_data = {
             "title": payload.title,
@@ -250,15 +333,18 @@ class CourseCatalogService:
             "prerequisites": payload.prerequisites,
             "tags": payload.tags,
             "thumbnail": payload.thumbnail,
-            "updated_at": datetime.utcnow(),
+            "updated_at": datetime.now(timezone.utc),
         }
         
-        await course_catalog_collection.update_one(
+        updated_course = await course_catalog_collection.find_one_and_update(
             {"slug": slug},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
         )
-        
-        updated_course = await course_catalog_collection.find_one({"slug": slug})
+        if not updated_course:
+            raise HTTPException(status_code=404, detail=_COURSE_NOT_FOUND)
+        invalidate_catalog_course(slug)
+        await cache_delete_prefix(CATALOG_CACHE_PREFIX)
         
         return {
             "message": "Course updated successfully",
@@ -268,19 +354,28 @@ class CourseCatalogService:
     @staticmethod
     async def delete_course_catalog(slug: str):
         """Delete a course from the catalog"""
-        result = await course_catalog_collection.delete_one({"slug": slug})
+        # Profiles about to lose this course have cached get_user responses;
+        # collect them alongside the delete, before the $pull below
+        result, affected_user_ids = await asyncio.gather(
+            course_catalog_collection.delete_one({"slug": slug}),
+            user_profiles_collection.distinct("user_id", {"registered_courses": slug}),
+        )
         
         if result.deleted_count == 0:
-            raise HTTPException(404, {"message": "Course not found"})
-        
-        # Also delete any user enrollments for this course
-        await user_courses_collection.delete_many({"course_slug": slug})
-        
-        # Remove from user profiles
-        await user_profiles_collection.update_many(
-            {"registered_courses": slug},
-            {"$pull": {"registered_courses": slug}}
+            raise HTTPException(status_code=404, detail=_COURSE_NOT_FOUND)
+
+        # Also delete any user enrollments for this course and remove it
+        # from user profiles; the two writes are independent
+        await asyncio.gather(
+            user_courses_collection.delete_many({"course_slug": slug}),
+            user_profiles_collection.update_many(
+                {"registered_courses": slug},
+                {"$pull": {"registered_courses": slug}}
+            ),
         )
+        invalidate_catalog_course(slug)
+        await cache_delete_prefix(CATALOG_CACHE_PREFIX)
+        await cache_delete(*(user_cache_key(uid) for uid in affected_user_ids))
         
         return {
             "message": "Course deleted successfully",
@@ -290,35 +385,51 @@ class CourseCatalogService:
     @staticmethod
     async def get_course_catalog_stats():
         """Get statistics about the course catalog"""
-        total_courses = await course_catalog_collection.count_documents({})
-        
-        # Count total enrollments
-        total_enrollments = await user_courses_collection.count_documents({})
-        
-        # Count unique enrolled users
-        unique_users = len(await user_courses_collection.distinct("user_id"))
-        
-        # Get most popular courses by enrollment count
-        pipeline = [
-            {"$group": {"_id": "$course_slug", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
+        # One $facet pass per collection, both in flight at once
+        enrollment_pipeline = [
+            {"$facet": {
+                "total_enrollments": [{"$count": "n"}],
+                # Count unique enrolled users without shipping them back
+                "unique_users": [
+                    {"$group": {"_id": "$user_id"}},
+                    {"$count": "n"},
+                ],
+                # Most popular courses by enrollment count
+                "popular_courses": [
+                    {"$group": {"_id": "$course_slug", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 5},
+                ],
+            }}
         ]
-        popular_courses = await user_courses_collection.aggregate(pipeline).to_list(None)
-        
-        # Get category distribution
-        category_pipeline = [
-            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        categories = await course_catalog_collection.aggregate(category_pipeline).to_list(None)
-        
-        # Get difficulty distribution
-        difficulty_pipeline = [
-            {"$group": {"_id": "$difficulty", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
+        catalog_pipeline = [
+            {"$facet": {
+                "total_courses": [{"$count": "n"}],
+                "categories": [
+                    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                ],
+                "difficulties": [
+                    {"$group": {"_id": "$difficulty", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                ],
+            }}
         ]
-        difficulties = await course_catalog_collection.aggregate(difficulty_pipeline).to_list(None)
+        (enrollment_stats,), (catalog_stats,) = await asyncio.gather(
+            user_courses_collection.aggregate(enrollment_pipeline).to_list(1),
+            course_catalog_collection.aggregate(catalog_pipeline).to_list(1),
+        )
+
+        # $count emits nothing for an empty input
+        def facet_count(facet: list) -> int:
+            return facet[0]["n"] if facet else 0
+
+        total_courses = facet_count(catalog_stats["total_courses"])
+        total_enrollments = facet_count(enrollment_stats["total_enrollments"])
+        unique_users = facet_count(enrollment_stats["unique_users"])
+        popular_courses = enrollment_stats["popular_courses"]
+        categories = catalog_stats["categories"]
+        difficulties = catalog_stats["difficulties"]
         
         return {
             "message": "Course catalog statistics",
@@ -335,9 +446,8 @@ class CourseCatalogService:
     @staticmethod
     async def get_course_enrollments(course_slug: str, limit: int = Query(10, ge=1, le=100)):
         """Get recent enrollments for a course"""
-        enrollments = []
-        
-        # Get recent enrollments with user info
+        # Get recent enrollments with user info; the join only pulls the
+        # fields serialize_user needs
         pipeline = [
             {"$match": {"course_slug": course_slug}},
             {"$sort": {"enrolled_at": -1}},
@@ -347,23 +457,30 @@ class CourseCatalogService:
                     "from": "users",
                     "localField": "user_id",
                     "foreignField": "_id",
+                    "pipeline": [{"$project": USER_PROJECTION}],
                     "as": "user"
                 }
             },
             {"$unwind": "$user"},
         ]
         
-        async for enrollment in user_courses_collection.aggregate(pipeline):
-            enrollments.append({
+        # Both are served by the (course_slug, enrolled_at) index; run them
+        # together rather than back to back
+        enrollments, total_enrollments = await asyncio.gather(
+            user_courses_collection.aggregate(pipeline).to_list(None),
+            user_courses_collection.count_documents({"course_slug": course_slug}),
+        )
+        enrollments = [
+            {
                 "id": str(enrollment["_id"]),
                 "user": serialize_user(enrollment["user"]),
                 "progress": enrollment["progress"],
                 "completed": enrollment["completed"],
                 "enrolled_at": enrollment["enrolled_at"],
                 "last_accessed": enrollment.get("last_accessed"),
-            })
-        
-        total_enrollments = await user_courses_collection.count_documents({"course_slug": course_slug})
+            }
+            for enrollment in enrollments
+        ]
         
         return {
             "message": "Course enrollments fetched",
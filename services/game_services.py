@@ -1,19 +1,19 @@
 # app/services/game_services.py
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
 from database.database import game_progress_collection
-from services.auth_services import validate_object_id
+from utils.auth_utils import validate_object_id
+from services._serializers import serialize_game
 
-def serialize_game(game: dict) -> dict:
-    return {
-        "id": str(game["_id"]),
-        "userId": str(game["user_id"]),
-        "gameId": game["game_id"],
-        "level": game["level"],
-        "xp": game["xp"],
-        "lastPlayed": game["last_played"],
-    }
+GAME_PROJECTION = {
+    "user_id": 1,
+    "game_id": 1,
+    "level": 1,
+    "xp": 1,
+    "last_played": 1,
+}
 
 class GameService:
     
@@ -21,54 +21,33 @@ class GameService:
     async def get_game_progress(user_id: str):
         oid = validate_object_id(user_id)
 
-        games = []
-        async for g in game_progress_collection.find({"user_id": oid}):
-            games.append(serialize_game(g))
+        games = await game_progress_collection.find(
+            {"user_id": oid}, GAME_PROJECTION
+        ).batch_size(200).to_list(length=None)
 
         return {
             "message": "Game progress fetched",
-            "data": games,
+            "data": [serialize_game(g) for g in games],
         }
     
     @staticmethod
     async def update_game_progress(user_id: str, game_id: str, level: int, xp: int):
         oid = validate_object_id(user_id)
 
-        game = await game_progress_collection.find_one({
-            "user_id": oid,
-            "game_id": game_id
-        })
-
-        if not game:
-            # Create new game progress entry
-            game_data = {
-                "user_id": oid,
-                "game_id": game_id,
+        # Upsert on the unique (user_id, game_id) index: creates the entry on
+        # first play, updates it afterwards, in a single round trip.
+        game = await game_progress_collection.find_one_and_update(
+            {"user_id": oid, "game_id": game_id},
+            {"$set": {
                 "level": level,
                 "xp": xp,
-                "last_played": datetime.utcnow(),
-            }
-            result = await game_progress_collection.insert_one(game_data)
-            game_data["_id"] = result.inserted_id
-            
-            return {
-                "message": "Game progress created",
-                "data": serialize_game(game_data),
-            }
-        else:
-            # Update existing game progress
-            await game_progress_collection.update_one(
-                {"_id": game["_id"]},
-                {"$set": {
-                    "level": level,
-                    "xp": xp,
-                    "last_played": datetime.utcnow(),
-                }}
-            )
-            
-            updated_game = await game_progress_collection.find_one({"_id": game["_id"]})
-            
-            return {
-                "message": "Game progress updated",
-                "data": serialize_game(updated_game),
-            }
\ No newline at end of file
+                "last_played": datetime.now(timezone.utc),
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return {
+            "message": "Game progress updated",
+            "data": serialize_game(game),
+        }
\ No newline at end of file
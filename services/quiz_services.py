@@ -1,38 +1,40 @@
 # app/services/quiz_services.py
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List
+import orjson
 from bson import ObjectId
+from pymongo import ReturnDocument
 from database.database import (
     quiz_questions_collection,
     quiz_progress_collection,
     user_courses_collection
 )
 from schemas.schemas import QuizAttemptCreate, QuestionCreate
-from services.auth_services import validate_object_id
+from utils.auth_utils import validate_object_id
+from services._serializers import serialize_question, serialize_quiz_attempt
 
-def serialize_question(question: dict) -> dict:
-    return {
-        "id": str(question["_id"]),
-        "quizId": question["quiz_id"],
-        "question": question["question"],
-        "options": question["options"],
-        "correctAnswer": question["correct_answer"],
-        "explanation": question.get("explanation", ""),
-        "points": question.get("points", 1),
-        "questionType": question.get("question_type", "multiple_choice"),
-    }
-
-def serialize_quiz_attempt(attempt: dict) -> dict:
-    return {
-        "id": str(attempt["_id"]),
-        "userId": str(attempt["user_id"]),
-        "quizId": attempt["quiz_id"],
-        "courseSlug": attempt.get("course_slug"),
-        "score": attempt["score"],
-        "passed": attempt["passed"],
-        "attemptedAt": attempt["attempted_at"],
-    }
+QUESTION_PROJECTION = {
+    "quiz_id": 1,
+    "question": 1,
+    "options": 1,
+    "correct_answer": 1,
+    "explanation": 1,
+    "points": 1,
+    "question_type": 1,
+}
+# What players get: the answer never leaves the database
+PUBLIC_QUESTION_PROJECTION = {
+    field: 1 for field in QUESTION_PROJECTION if field != "correct_answer"
+}
+QUIZ_ATTEMPT_PROJECTION = {
+    "user_id": 1,
+    "quiz_id": 1,
+    "course_slug": 1,
+    "score": 1,
+    "passed": 1,
+    "attempted_at": 1,
+}
 
 class QuizService:
     
@@ -46,7 +48,7 @@ class QuizService:
             "explanation": payload.explanation,
             "points": payload.points,
             "question_type": payload.questionType,
-            "created_at": datetime.utcnow(),
+            "created_at": datetime.now(timezone.utc),
         }
 
         result = await quiz_questions_collection.insert_one(question)
@@ -59,37 +61,30 @@ class QuizService:
     
     @staticmethod
     async def get_quiz_questions(quiz_id: str):
-        questions = []
-        async for q in quiz_questions_collection.find({"quiz_id": quiz_id}):
-            # Don't send correct answer to client for security
-            q_data = serialize_question(q)
-            q_data.pop("correctAnswer", None)
-            questions.append(q_data)
+        # Don't send correct answer to client for security
+        questions = await quiz_questions_collection.find(
+            {"quiz_id": quiz_id}, PUBLIC_QUESTION_PROJECTION
+        ).batch_size(200).to_list(length=None)
 
         return {
             "message": "Quiz questions fetched",
-            "data": questions,
+            "data": [serialize_question(q) for q in questions],
         }
     
     @staticmethod
     async def get_all_quiz_questions():
-        """Fetch all quiz questions in the system (admin or analytics use)."""
-        questions = []
-        cursor = quiz_questions_collection.find()
+        """Stream all quiz questions in the system as NDJSON (admin or analytics use)."""
+        cursor = quiz_questions_collection.find({}, QUESTION_PROJECTION).batch_size(500)
         
         async for q in cursor:
-            questions.append(serialize_question(q))
-        
-        return {
-            "message": "All quiz questions fetched",
-            "data": questions,
-        }
+            yield orjson.dumps(serialize_question(q)) + b"\n"
     
     @staticmethod
     async def submit_quiz_attempt(user_id: str, payload: QuizAttemptCreate):
         oid = validate_object_id(user_id)
         
         passed = payload.score >= 60
+        now = datetime.now(timezone.utc)
 
         attempt = {
             "user_id": oid,
@@ -97,34 +92,33 @@ class QuizService:
             "course_slug": payload.courseSlug,
             "score": payload.score,
             "passed": passed,
-            "attempted_at": datetime.utcnow(),
+            "attempted_at": now,
         }
 
         # Auto-update course progress if quiz is passed and course slug is provided
         if passed and payload.courseSlug:
-            # Get current course progress
-            course = await user_courses_collection.find_one({
-                "user_id": oid,
-                "course_slug": payload.courseSlug
-            })
+            # Increase progress by 10% for each passed quiz (max 100%) on the
+            # server, so the enrollment never has to be read first
+            course = await user_courses_collection.find_one_and_update(
+                {"user_id": oid, "course_slug": payload.courseSlug},
+                [
+                    {"$set": {
+                        "progress": {"$min": [
+                            {"$add": [{"$ifNull": ["$progress", 0]}, 10]},
+                            100,
+                        ]},
+                        "last_accessed": now,
+                    }},
+                    {"$set": {"completed": {"$gte": ["$progress", 100]}}},
+                ],
+                projection={"progress": 1},
+                return_document=ReturnDocument.AFTER,
+            )
             
             if course:
-                # Calculate new progress (increase by 10% for each passed quiz, max 100%)
-                new_progress = min(course.get("progress", 0) + 10, 100)
-                completed = new_progress >= 100
-                
-                await user_courses_collection.update_one(
-                    {"_id": course["_id"]},
-                    {"$set": {
-                        "progress": new_progress,
-                        "completed": completed,
-                        "last_accessed": datetime.utcnow(),
-                    }}
-                )
-                
                 # Also update attempt with course info
                 attempt["progress_increment"] = 10
-                attempt["new_progress"] = new_progress
+                attempt["new_progress"] = course["progress"]
 
         result = await quiz_progress_collection.insert_one(attempt)
         attempt["_id"] = result.inserted_id
@@ -138,11 +132,11 @@ class QuizService:
     async def get_user_quiz_attempts(user_id: str):
         oid = validate_object_id(user_id)
 
-        attempts = []
-        async for a in quiz_progress_collection.find({"user_id": oid}):
-            attempts.append(serialize_quiz_attempt(a))
+        attempts = await quiz_progress_collection.find(
+            {"user_id": oid}, QUIZ_ATTEMPT_PROJECTION
+        ).batch_size(200).to_list(length=None)
 
         return {
             "message": "Quiz attempts fetched",
-            "data": attempts,
+            "data": [serialize_quiz_attempt(a) for a in attempts],
         }
\ No newline at end of file
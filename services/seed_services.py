@@ -1,6 +1,8 @@
 # app/services/seed_services.py
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from database.database import (
     user_profiles_collection,
     user_courses_collection,
@@ -32,36 +34,68 @@ ROLE_DEFAULTS = {
     },
 }
 
+async def _insert_missing(collection, docs: list):
+    # ordered=False still writes every other doc when one hits the unique
+    # index, e.g. a course the user enrolled in before the seed ran
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        if any(err["code"] != 11000 for err in exc.details["writeErrors"]):
+            raise
+
 async def seed_user_data(user_id: ObjectId, role: str):
     defaults = ROLE_DEFAULTS.get(role, ROLE_DEFAULTS["User"])
 
-    # Create user profile
-    await user_profiles_collection.insert_one({
-        "user_id": user_id,
-        "role": role,
-        "registered_courses": [course["slug"] for course in defaults["courses"]],
-        "created_at": datetime.utcnow(),
-    })
+    now = datetime.now(timezone.utc)
+
+    # Upsert rather than insert: an enrollment made before the seed runs
+    # creates the profile first, and its course must be kept
+    profile_update = {
+        "$set": {"role": role},
+        "$setOnInsert": {"created_at": now},
+        "$addToSet": {
+            "registered_courses": {
+                "$each": [course["slug"] for course in defaults["courses"]]
+            }
+        },
+    }
 
-    # Enroll in default courses
-    for course in defaults["courses"]:
-        await user_courses_collection.insert_one({
-            "user_id": user_id,
+    # Enroll in default courses; shared fields come from one template
+    course_template = {
+        "user_id": user_id,
+        "progress": 0,
+        "completed": False,
+        "last_accessed": None,
+        "enrolled_at": now,
+    }
+    course_docs = [
+        {
+            **course_template,
             "course_slug": course["slug"],
             "category": course["category"],
             "difficulty": course["difficulty"],
-            "progress": 0,
-            "completed": False,
-            "last_accessed": None,
-            "enrolled_at": datetime.utcnow(),
-        })
+        }
+        for course in defaults["courses"]
+    ]
 
     # Initialize game progress
-    for game in defaults["games"]:
-        await game_progress_collection.insert_one({
-            "user_id": user_id,
-            "game_id": game,
-            "level": 1,
-            "xp": 0,
-            "last_played": None,
-        })
\ No newline at end of file
+    game_template = {
+        "user_id": user_id,
+        "level": 1,
+        "xp": 0,
+        "last_played": None,
+    }
+    game_docs = [{**game_template, "game_id": game} for game in defaults["games"]]
+
+    # One write per collection, all in flight at once. insert_many rejects
+    # an empty batch, so roles without games/courses skip that call.
+    writes = [
+        user_profiles_collection.update_one(
+            {"user_id": user_id}, profile_update, upsert=True
+        )
+    ]
+    if course_docs:
+        writes.append(_insert_missing(user_courses_collection, course_docs))
+    if game_docs:
+        writes.append(_insert_missing(game_progress_collection, game_docs))
+    await asyncio.gather(*writes)
\ No newline at end of file
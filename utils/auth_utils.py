@@ -0,0 +1,57 @@
+# app/utils/auth_utils.py
+from fastapi import HTTPException, status
+from bson import ObjectId
+from bson.errors import InvalidId
+from functools import lru_cache
+from typing import Optional
+import hashlib
+import hmac
+
+def hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+def verify_password(plain: str, hashed: str) -> bool:
+    # constant-time comparison so login timing doesn't leak the stored hash
+    return hmac.compare_digest(hash_password(plain), hashed)
+
+_INVALID_OBJECT_ID = {"message": "Invalid user ID"}
+
+# Bounded so a client cycling through random ids can't grow it without limit.
+# Only 24-character strings reach it; malformed ones of that length are cached
+# as None, the HTTPException itself is built and raised by the caller.
+@lru_cache(maxsize=8192)
+def _to_object_id(value: str) -> Optional[ObjectId]:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+def validate_object_id(user_id: str) -> ObjectId:
+    # Reject wrong-length junk before it can take up cache slots
+    oid = _to_object_id(user_id) if len(user_id) == 24 else None
+    if oid is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_INVALID_OBJECT_ID,
+        )
+    return oid
+
+# Only the fields serialize_user reads
+USER_PROJECTION = {
+    "_id": 1,
+    "email": 1,
+    "first_name": 1,
+    "last_name": 1,
+    "role": 1,
+    "is_active": 1,
+}
+
+def serialize_user(user: dict) -> dict:
+    return {
+        "id": str(user["_id"]),
+        "email": user["email"],
+        "firstName": user.get("first_name"),
+        "lastName": user.get("last_name"),
+        "role": user.get("role", "User"),
+        "isActive": user.get("is_active", True),
+    }
\ No newline at end of file